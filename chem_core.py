@@ -0,0 +1,166 @@
+"""Chemical data and reaction logic for the Virtual Chemistry Lab, independent of the page UI."""
+import functools
+from types import MappingProxyType
+
+import numpy as np
+import streamlit as st
+from numba import njit
+
+# --- Chemical Data ---
+@functools.lru_cache(maxsize=1)
+def _chemical_data():
+    # Read-only so every importer shares the same table without copying or mutating it
+    data = {
+        "Water (H2O)": {"mm": 18.02, "type": "Solvent", "conc": 55.5, "state": "L", "color": "#1E90FF"},
+        "Sodium chloride (table salt)": {"mm": 58.44, "type": "Ionic Solid", "conc": 0, "state": "S", "color": "#F0F8FF"},
+        "Vinegar (dilute acetic acid)": {"mm": 60.05, "type": "Weak Acid", "conc": 0.85, "state": "L", "color": "#FFFACD"},
+        "Baking soda (sodium bicarbonate)": {"mm": 84.01, "type": "Carbonate Base", "conc": 0, "state": "S", "color": "#F5F5DC"},
+        "Sugar (sucrose)": {"mm": 342.3, "type": "Molecular Solid", "conc": 0, "state": "S", "color": "#FFFAFA"},
+        "Ethanol (dilute)": {"mm": 46.07, "type": "Molecular Liquid", "conc": 1.7, "state": "L", "color": "#F0FFFF"},
+        "Hydrochloric acid (very dilute)": {"mm": 36.46, "type": "Strong Acid", "conc": 0.1, "state": "L", "color": "#FFE4E1"},
+        "Sodium hydroxide (very dilute)": {"mm": 40.00, "type": "Strong Base", "conc": 0.1, "state": "L", "color": "#FAFAD2"},
+        "Hydrogen peroxide (3%)": {"mm": 34.01, "type": "Oxidizer", "conc": 0.88, "state": "L", "color": "#F0FFF0"},
+        "Bleach (sodium hypochlorite, dilute)": {"mm": 74.44, "type": "Oxidizer", "conc": 0.7, "state": "L", "color": "#ADD8E6"},
+        "Ammonia solution (household, dilute)": {"mm": 17.03, "type": "Weak Base", "conc": 1.5, "state": "L", "color": "#E0FFFF"},
+        "Calcium carbonate (chalk)": {"mm": 100.09, "type": "Carbonate Solid", "conc": 0, "state": "S", "color": "#FFFAF0"},
+        "Copper sulfate (dilute)": {"mm": 159.61, "type": "Ionic Solution", "conc": 0.1, "state": "L", "color": "#4682B4"},
+    }
+    return MappingProxyType({name: MappingProxyType(props) for name, props in data.items()})
+
+CHEMICAL_DATA = _chemical_data()
+
+SAFE_CHEMICALS = tuple(CHEMICAL_DATA.keys())
+
+# Reaction-relevant type flags, combined as bitmasks (e.g. "Carbonate Base" = BASE | CARBONATE)
+ACID, BASE, CARBONATE, SOLID = 1, 2, 4, 8
+
+def _type_bits(data):
+    bits = 0
+    if 'Acid' in data['type']:
+        bits |= ACID
+    if 'Base' in data['type']:
+        bits |= BASE
+    if 'Carbonate' in data['type']:
+        bits |= CARBONATE
+    if data['state'] == 'S':
+        bits |= SOLID
+    return bits
+
+@st.cache_resource
+def build_chem_tables():
+    # Structure-of-arrays view of CHEMICAL_DATA, indexed by position in SAFE_CHEMICALS
+    rows = [CHEMICAL_DATA[chem] for chem in SAFE_CHEMICALS]
+    names = tuple(SAFE_CHEMICALS)
+    mm_arr = np.array([d['mm'] for d in rows], dtype=np.float64)
+    conc_arr = np.array([d['conc'] for d in rows], dtype=np.float64)
+    state_arr = np.array([d['state'] for d in rows])
+    type_bits_arr = np.array([_type_bits(d) for d in rows], dtype=np.uint8)
+    colors_rgb_arr = np.array(
+        [[int(d['color'][i:i+2], 16) for i in (1, 3, 5)] for d in rows], dtype=np.uint8
+    )
+    return names, mm_arr, conc_arr, state_arr, type_bits_arr, colors_rgb_arr
+
+NAMES, MM_ARR, CONC_ARR, STATE_ARR, TYPE_BITS_ARR, COLORS_RGB_ARR = build_chem_tables()
+
+# Indices of chemicals that specific reaction rules look for
+WATER_IDX = SAFE_CHEMICALS.index('Water (H2O)')
+COPPER_IDX = SAFE_CHEMICALS.index('Copper sulfate (dilute)')
+
+# --- Helper Functions ---
+def standardize_amount(idx, amount, unit):
+    # Liquids: concentration (mol/L) x volume in litres; solids: grams / molar mass.
+    # Accepts scalars or equal-length arrays so a whole editor table converts in one call.
+    volume_l = np.where(unit == 'ml', amount / 1000.0, amount)
+    return np.where(
+        STATE_ARR[idx] == 'L',
+        CONC_ARR[idx] * volume_l,
+        amount / MM_ARR[idx],
+    )
+
+def validate_units(idx, unit):
+    # Liquids are measured in ml or l, solids in g. Returns a mask of rows whose unit
+    # fits their state.
+    return np.where(STATE_ARR[idx] == 'L', np.isin(unit, ('ml', 'l')), unit == 'g')
+
+@njit(cache=True)
+def _react_kernel(moles, bits):
+    # One pass over the selection: per-class mole totals plus the OR of every type flag seen
+    acid = base = carb = 0.0
+    seen = 0
+    for i in range(moles.size):
+        x = moles[i]
+        t = bits[i]
+        seen |= t
+        if t & ACID:
+            acid += x
+        if t & BASE:
+            base += x
+        if t & CARBONATE:
+            carb += x
+    return acid, base, carb, seen
+
+# Compile (or load from the on-disk cache) at import so the first Mix doesn't pay for it
+_react_kernel(np.zeros(1), np.zeros(1, dtype=np.uint8))
+
+def calculate_reaction(selected):
+    # Canonical, hashable view of the selection so repeated Mix clicks hit the cache
+    key = tuple(sorted((idx, c['moles'], c['type_bits']) for idx, c in selected.items()))
+    return _calc(key)
+
+@st.cache_data(max_entries=256)
+def _calc(key):
+    desc = []
+    idxs = np.fromiter((k[0] for k in key), dtype=np.intp, count=len(key))
+    moles = np.fromiter((k[1] for k in key), dtype=np.float64, count=len(key))
+    bits = np.fromiter((k[2] for k in key), dtype=np.uint8, count=len(key))
+    selected_idx_set = frozenset(k[0] for k in key)
+    # Calculate total reactive moles
+    acid_moles, base_moles, total_carbonate_moles, seen = _react_kernel(moles, bits)
+    # Solids that aren't themselves an acid or base can dissolve in water
+    is_solid = ((bits & SOLID) != 0) & ((bits & (ACID | BASE)) == 0)
+    
+    reaction_happened = False
+    
+    # 1. Acid-Base Neutralization
+    if acid_moles > 0 and base_moles > 0:
+        min_moles = min(acid_moles, base_moles)
+        desc.append(f"**Neutralization!** Salt and water formed. Reacted: $\\approx {min_moles:.3f}$ mol")
+        reaction_happened = True
+
+    # 2. Acid-Carbonate Reaction (CO2 gas)
+    if seen & ACID and seen & CARBONATE:
+        co2_moles = min(acid_moles, total_carbonate_moles)
+        if co2_moles > 0:
+            desc.append(f"**Gas Evolution!** $\\text{{CO}}_2$ gas bubbled off: $\\approx {co2_moles:.3f}$ mol")
+            reaction_happened = True
+
+    # 3. Dissolution (Solid in water)
+    if WATER_IDX in selected_idx_set and is_solid.any():
+        for s_idx, s_moles in zip(idxs[is_solid], moles[is_solid]):
+            # Check if solid is soluble (for simplicity, we assume the selected solids are soluble enough)
+            if s_moles > 0:
+                desc.append(f"**Dissolving!** {NAMES[s_idx]} dissolved in water ($\\approx {s_moles:.3f}$ mol)")
+                reaction_happened = True
+    
+    # 4. Specific Precipitation Example (Copper Sulfate + Base)
+    if COPPER_IDX in selected_idx_set and seen & BASE:
+        desc.append("**Precipitation!** Blue copper hydroxide solid formed. (Simplified)")
+        reaction_happened = True
+
+    if not desc:
+        if len(key)==1:
+            desc.append("Single chemical selected. No reaction.")
+        else:
+            desc.append("No known reaction. Likely a simple mixture or dissolution.")
+            
+    if reaction_happened:
+        return "<span style='color:red; font-weight:bold;'>REACTION OCCURRED!</span> " + ' | '.join(desc)
+    else:
+        return ' | '.join(desc)
+
+def mix_colors(idxs):
+    # Simple color averaging for a mixture effect: gather the precomputed RGB rows and
+    # take the per-channel integer mean
+    rgb = COLORS_RGB_ARR[np.asarray(idxs, dtype=np.intp)]
+    r, g, b = (rgb.sum(axis=0, dtype=np.uint32) // len(rgb)).tolist()
+    return f'#{r:02x}{g:02x}{b:02x}'
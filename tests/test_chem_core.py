@@ -0,0 +1,120 @@
+import numpy as np
+
+from chem_core import (
+    ACID,
+    BASE,
+    CARBONATE,
+    CHEMICAL_DATA,
+    NAMES,
+    SOLID,
+    TYPE_BITS_ARR,
+    _react_kernel,
+    calculate_reaction,
+    mix_colors,
+    standardize_amount,
+    validate_units,
+)
+
+WATER = NAMES.index('Water (H2O)')
+SALT = NAMES.index('Sodium chloride (table salt)')
+VINEGAR = NAMES.index('Vinegar (dilute acetic acid)')
+BAKING_SODA = NAMES.index('Baking soda (sodium bicarbonate)')
+SUGAR = NAMES.index('Sugar (sucrose)')
+HCL = NAMES.index('Hydrochloric acid (very dilute)')
+NAOH = NAMES.index('Sodium hydroxide (very dilute)')
+AMMONIA = NAMES.index('Ammonia solution (household, dilute)')
+CHALK = NAMES.index('Calcium carbonate (chalk)')
+COPPER = NAMES.index('Copper sulfate (dilute)')
+REACTION = "<span style='color:red; font-weight:bold;'>REACTION OCCURRED!</span> "
+
+
+def _selection(*pairs):
+    return {idx: {'moles': moles, 'type_bits': int(TYPE_BITS_ARR[idx])} for idx, moles in pairs}
+
+
+def test_validate_units_rejects_grams_for_liquids():
+    idxs = np.array([WATER, WATER, WATER])
+    ok = validate_units(idxs, np.array(['ml', 'l', 'g']))
+    assert ok.tolist() == [True, True, False]
+
+
+def test_validate_units_rejects_volumes_for_solids():
+    idxs = np.array([SALT, SALT, SALT])
+    ok = validate_units(idxs, np.array(['ml', 'l', 'g']))
+    assert ok.tolist() == [False, False, True]
+
+
+def test_standardize_amount_liquid_ml():
+    assert np.isclose(standardize_amount(WATER, 10.0, 'ml'), 0.555)
+
+
+def test_standardize_amount_keeps_baseline_rounding():
+    # conc * (amount / 1000) gives exactly 0.0085 mol, which the messages show as 0.009
+    moles = float(standardize_amount(VINEGAR, 10.0, 'ml'))
+    assert f"{moles:.3f}" == "0.009"
+    selected = {
+        VINEGAR: {'moles': moles, 'type_bits': int(TYPE_BITS_ARR[VINEGAR])},
+        BAKING_SODA: {'moles': float(standardize_amount(BAKING_SODA, 10.0, 'g')), 'type_bits': int(TYPE_BITS_ARR[BAKING_SODA])},
+    }
+    assert "Reacted: $\\approx 0.009$ mol" in calculate_reaction(selected)
+
+
+def test_standardize_amount_solid_grams():
+    assert np.isclose(standardize_amount(SALT, 10.0, 'g'), 10.0 / 58.44)
+
+
+def test_calculate_reaction_neutralization():
+    result = calculate_reaction(_selection((HCL, 0.01), (NAOH, 0.004)))
+    assert result == REACTION + "**Neutralization!** Salt and water formed. Reacted: $\\approx 0.004$ mol"
+
+
+def test_calculate_reaction_gas_evolution():
+    result = calculate_reaction(_selection((HCL, 0.002), (CHALK, 0.1)))
+    assert result == REACTION + "**Gas Evolution!** $\\text{CO}_2$ gas bubbled off: $\\approx 0.002$ mol"
+
+
+def test_calculate_reaction_dissolution():
+    result = calculate_reaction(_selection((WATER, 0.5), (SUGAR, 0.03)))
+    assert result == REACTION + "**Dissolving!** Sugar (sucrose) dissolved in water ($\\approx 0.030$ mol)"
+
+
+def test_calculate_reaction_precipitation():
+    result = calculate_reaction(_selection((COPPER, 0.001), (AMMONIA, 0.015)))
+    assert result == REACTION + "**Precipitation!** Blue copper hydroxide solid formed. (Simplified)"
+
+
+def test_calculate_reaction_single_chemical():
+    assert calculate_reaction(_selection((WATER, 0.5))) == "Single chemical selected. No reaction."
+
+
+def test_calculate_reaction_no_known_reaction():
+    result = calculate_reaction(_selection((WATER, 0.5), (NAMES.index('Ethanol (dilute)'), 0.01)))
+    assert result == "No known reaction. Likely a simple mixture or dissolution."
+
+
+def test_react_kernel_totals_and_seen_flags():
+    bits = TYPE_BITS_ARR[[HCL, BAKING_SODA, CHALK]]
+    acid, base, carb, seen = _react_kernel(np.array([0.1, 0.2, 0.3]), bits)
+    assert np.isclose(acid, 0.1)
+    assert np.isclose(base, 0.2)
+    assert np.isclose(carb, 0.5)
+    assert seen == ACID | BASE | CARBONATE | SOLID
+
+
+def test_presence_checks_use_seen_flags():
+    # A base with zero moles is still present, so copper sulfate precipitates
+    result = calculate_reaction(_selection((COPPER, 0.001), (NAOH, 0.0)))
+    assert "**Precipitation!**" in result
+    # An acid with zero moles is present but releases no CO2
+    assert "Gas Evolution" not in calculate_reaction(_selection((HCL, 0.0), (CHALK, 0.1)))
+    # Without any acid there is no CO2, however much carbonate there is
+    assert "Gas Evolution" not in calculate_reaction(_selection((WATER, 0.5), (CHALK, 0.1)))
+
+
+def test_mix_colors_matches_hex_average():
+    def hex_average(colors):
+        channels = [sum(int(c[i:i + 2], 16) for c in colors) // len(colors) for i in (1, 3, 5)]
+        return '#{:02x}{:02x}{:02x}'.format(*channels)
+
+    for idxs in ([WATER], [WATER, COPPER], [SALT, VINEGAR, BAKING_SODA], list(range(len(NAMES)))):
+        assert mix_colors(idxs) == hex_average([CHEMICAL_DATA[NAMES[i]]['color'] for i in idxs])